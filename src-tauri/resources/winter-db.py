@@ -1,132 +1,276 @@
 #!/usr/bin/env python3
 """winter-db.py — Winter's SQLite memory index. stdlib only."""
 
+import atexit
 import sqlite3
-import json
-import argparse
 import sys
 import os
-from datetime import datetime, timezone
 
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "winter.db")
+# Bump when _SCHEMA changes; stored in PRAGMA user_version.
+SCHEMA_VERSION = 6
 
 
 def get_conn():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = sqlite3.connect(DB_PATH, cached_statements=256)
     conn.execute("PRAGMA foreign_keys = ON")
+    # per-connection tuning; journal_mode=WAL is persistent and set in migrate
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA mmap_size = 134217728")
+    conn.execute("PRAGMA cache_size = -8000")
     return conn
 
 
-def init_db(conn):
-    conn.executescript("""
-        CREATE TABLE IF NOT EXISTS tasks (
-            id TEXT PRIMARY KEY,
-            title TEXT NOT NULL,
-            status TEXT DEFAULT 'active',
-            created_at TEXT DEFAULT (datetime('now')),
-            updated_at TEXT DEFAULT (datetime('now')),
-            taskinfo_path TEXT,
-            summary TEXT
-        );
-        CREATE TABLE IF NOT EXISTS agent_runs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_id TEXT,
-            agent TEXT NOT NULL,
-            action TEXT NOT NULL,
-            result TEXT DEFAULT 'pending',
-            session_id TEXT,
-            started_at TEXT DEFAULT (datetime('now')),
-            completed_at TEXT,
-            notes TEXT,
-            FOREIGN KEY (task_id) REFERENCES tasks(id)
-        );
-        CREATE TABLE IF NOT EXISTS errors (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            pattern TEXT NOT NULL,
-            context TEXT,
-            solution TEXT,
-            occurrences INTEGER DEFAULT 1,
-            first_seen TEXT DEFAULT (datetime('now')),
-            last_seen TEXT DEFAULT (datetime('now'))
-        );
-        CREATE TABLE IF NOT EXISTS context_snapshots (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id TEXT,
-            created_at TEXT DEFAULT (datetime('now')),
-            active_tasks TEXT,
-            current_work TEXT,
-            pending_items TEXT,
-            notes TEXT
-        );
-    """)
-    conn.commit()
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        status TEXT DEFAULT 'active',
+        created_at TEXT DEFAULT (datetime('now')),
+        updated_at TEXT DEFAULT (datetime('now')),
+        taskinfo_path TEXT,
+        summary TEXT
+    );
+    CREATE TABLE IF NOT EXISTS agent_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id TEXT,
+        agent TEXT NOT NULL,
+        action TEXT NOT NULL,
+        result TEXT DEFAULT 'pending',
+        session_id TEXT,
+        started_at TEXT DEFAULT (datetime('now')),
+        completed_at TEXT,
+        notes TEXT,
+        FOREIGN KEY (task_id) REFERENCES tasks(id)
+    );
+    CREATE TABLE IF NOT EXISTS errors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pattern TEXT NOT NULL,
+        context TEXT,
+        solution TEXT,
+        occurrences INTEGER DEFAULT 1,
+        first_seen TEXT DEFAULT (datetime('now')),
+        last_seen TEXT DEFAULT (datetime('now'))
+    );
+    CREATE TABLE IF NOT EXISTS context_snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT,
+        created_at TEXT DEFAULT (datetime('now')),
+        active_tasks TEXT,
+        current_work TEXT,
+        pending_items TEXT,
+        notes TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_tasks_status_updated ON tasks(status, updated_at DESC);
+    CREATE INDEX IF NOT EXISTS idx_runs_task ON agent_runs(task_id, id DESC);
+    CREATE INDEX IF NOT EXISTS idx_runs_agent ON agent_runs(agent, id DESC);
+    CREATE INDEX IF NOT EXISTS idx_errors_last_seen ON errors(last_seen DESC);
+    CREATE INDEX IF NOT EXISTS idx_errors_occ ON errors(occurrences DESC);
+    CREATE INDEX IF NOT EXISTS idx_snap_session ON context_snapshots(session_id, id DESC);
+
+    -- errors_fts is derived data: drop it and its triggers while errors is
+    -- rewritten below; _SCHEMA_FTS recreates them and rebuilds the index
+    DROP TRIGGER IF EXISTS errors_fts_ai;
+    DROP TRIGGER IF EXISTS errors_fts_ad;
+    DROP TRIGGER IF EXISTS errors_fts_au;
+    DROP TABLE IF EXISTS errors_fts;
+
+    -- fold duplicate patterns into the oldest row before enforcing uniqueness
+    UPDATE errors SET
+        occurrences = (SELECT SUM(d.occurrences) FROM errors d WHERE d.pattern = errors.pattern),
+        first_seen = (SELECT MIN(d.first_seen) FROM errors d WHERE d.pattern = errors.pattern),
+        last_seen = (SELECT MAX(d.last_seen) FROM errors d WHERE d.pattern = errors.pattern),
+        context = COALESCE((SELECT d.context FROM errors d WHERE d.pattern = errors.pattern AND d.context IS NOT NULL ORDER BY d.id DESC LIMIT 1), context),
+        solution = COALESCE((SELECT d.solution FROM errors d WHERE d.pattern = errors.pattern AND d.solution IS NOT NULL ORDER BY d.id DESC LIMIT 1), solution)
+    WHERE id IN (SELECT MIN(id) FROM errors GROUP BY pattern HAVING COUNT(*) > 1);
+    DELETE FROM errors WHERE id NOT IN (SELECT MIN(id) FROM errors GROUP BY pattern);
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_errors_pattern ON errors(pattern);
+"""
+
+# Optional: needs FTS5 with the trigram tokenizer (SQLite >= 3.34). Without it
+# errors_fts is simply absent and `errors <query>` falls back to a LIKE scan.
+_SCHEMA_FTS = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS errors_fts USING fts5(
+        pattern, context, solution, content='errors', content_rowid='id', tokenize='trigram'
+    );
+    CREATE TRIGGER IF NOT EXISTS errors_fts_ai AFTER INSERT ON errors BEGIN
+        INSERT INTO errors_fts(rowid,pattern,context,solution) VALUES (new.id,new.pattern,new.context,new.solution);
+    END;
+    CREATE TRIGGER IF NOT EXISTS errors_fts_ad AFTER DELETE ON errors BEGIN
+        INSERT INTO errors_fts(errors_fts,rowid,pattern,context,solution) VALUES ('delete',old.id,old.pattern,old.context,old.solution);
+    END;
+    CREATE TRIGGER IF NOT EXISTS errors_fts_au AFTER UPDATE ON errors BEGIN
+        INSERT INTO errors_fts(errors_fts,rowid,pattern,context,solution) VALUES ('delete',old.id,old.pattern,old.context,old.solution);
+        INSERT INTO errors_fts(rowid,pattern,context,solution) VALUES (new.id,new.pattern,new.context,new.solution);
+    END;
+    INSERT INTO errors_fts(errors_fts) VALUES ('rebuild');
+"""
+
+
+def _run_script(conn, script):
+    """Run a multi-statement script inside the open transaction.
+
+    executescript() would COMMIT first, so statements are split with
+    sqlite3.complete_statement and executed one at a time instead.
+    """
+    stmt = ""
+    for line in script.splitlines(keepends=True):
+        stmt += line
+        if sqlite3.complete_statement(stmt):
+            conn.execute(stmt)
+            stmt = ""
+
+
+def migrate(conn):
+    """Bring the schema up to SCHEMA_VERSION in one write-locked transaction.
+
+    The version is re-read after the lock is taken, so concurrent callers
+    migrate at most once and an interrupted run leaves nothing half-applied.
+    """
+    # journal_mode can't change inside a transaction; it persists in the file
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            _run_script(conn, _SCHEMA)
+            conn.execute("SAVEPOINT fts")
+            try:
+                _run_script(conn, _SCHEMA_FTS)
+            except sqlite3.OperationalError:
+                conn.execute("ROLLBACK TO fts")
+            conn.execute("RELEASE fts")
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+_CONN = None
+
+
+def _conn():
+    """Process-wide connection, opened and schema-checked on first use."""
+    global _CONN
+    if _CONN is None:
+        _CONN = get_conn()
+        # Lock-free fast path: an up-to-date file never takes the write lock.
+        # Whether to migrate is decided by migrate() itself, which re-reads
+        # user_version under BEGIN IMMEDIATE before touching the schema.
+        if _CONN.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            migrate(_CONN)
+        atexit.register(_CONN.close)
+    return _CONN
+
+
+def _read_jsonl(required, optional):
+    """Parse JSON objects, one per line, from stdin. Exits on malformed input.
+
+    Required keys must be non-blank strings; optional keys may be absent,
+    null, or a scalar (string/number) that SQLite can bind.
+    """
+    import json
+    rows = []
+    for n, line in enumerate(sys.stdin, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError:
+            print(f"error: line {n}: invalid JSON", file=sys.stderr)
+            sys.exit(1)
+        if not isinstance(row, dict):
+            print(f"error: line {n}: expected a JSON object", file=sys.stderr)
+            sys.exit(1)
+        missing = [k for k in required if not isinstance(row.get(k), str) or not row[k].strip()]
+        if missing:
+            print(f"error: line {n}: missing {', '.join(missing)}", file=sys.stderr)
+            sys.exit(1)
+        # bool is an int subclass, so JSON true/false must be excluded explicitly
+        invalid = [
+            k for k in optional
+            if row.get(k) is not None and (isinstance(row[k], bool) or not isinstance(row[k], (str, int, float)))
+        ]
+        if invalid:
+            print(f"error: line {n}: {', '.join(invalid)} must be a string or number", file=sys.stderr)
+            sys.exit(1)
+        rows.append(row)
+    return rows
 
 
 # ── tasks ──────────────────────────────────────────────────────────────────
 
+_SQL_TASKS_ALL = "SELECT id,status,title,summary FROM tasks ORDER BY updated_at DESC"
+_SQL_TASKS_BY_STATUS = "SELECT id,status,title,summary FROM tasks WHERE status=? ORDER BY updated_at DESC"
+
+
 def cmd_tasks(args):
-    conn = get_conn()
-    init_db(conn)
+    conn = _conn()
     if args.all:
-        rows = conn.execute("SELECT id,status,title,summary FROM tasks ORDER BY updated_at DESC").fetchall()
-    elif args.status:
-        rows = conn.execute("SELECT id,status,title,summary FROM tasks WHERE status=? ORDER BY updated_at DESC", (args.status,)).fetchall()
+        rows = conn.execute(_SQL_TASKS_ALL)
     else:
-        rows = conn.execute("SELECT id,status,title,summary FROM tasks WHERE status='active' ORDER BY updated_at DESC").fetchall()
-    if not rows:
+        rows = conn.execute(_SQL_TASKS_BY_STATUS, (args.status or 'active',))
+    out = []
+    for tid, status, title, summary in rows:
+        summary = f" | {summary}" if summary else ""
+        out.append(f"[{status}] {tid}: {title}{summary}")
+    if not out:
         print("no tasks")
         return
-    for r in rows:
-        summary = f" | {r['summary']}" if r['summary'] else ""
-        print(f"[{r['status']}] {r['id']}: {r['title']}{summary}")
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def cmd_task_add(args):
     if not args.id.strip():
         print("error: id cannot be empty", file=sys.stderr)
         sys.exit(1)
-    conn = get_conn()
-    init_db(conn)
+    conn = _conn()
     try:
-        conn.execute(
-            "INSERT INTO tasks (id,title,summary,taskinfo_path) VALUES (?,?,?,?)",
-            (args.id, args.title, args.summary, args.taskinfo_path)
-        )
-        conn.commit()
+        with conn:
+            conn.execute(
+                "INSERT INTO tasks (id,title,summary,taskinfo_path) VALUES (?,?,?,?)",
+                (args.id, args.title, args.summary, args.taskinfo_path)
+            )
         print(f"task added: {args.id}")
     except sqlite3.IntegrityError:
         print(f"error: task '{args.id}' already exists. use task-update.", file=sys.stderr)
         sys.exit(1)
 
 
+def cmd_task_add_bulk(args):
+    rows = _read_jsonl(("id", "title"), ("summary", "taskinfo_path"))
+    conn = _conn()
+    try:
+        with conn:
+            conn.executemany(
+                "INSERT INTO tasks (id,title,summary,taskinfo_path) VALUES (?,?,?,?)",
+                [(r["id"], r["title"], r.get("summary"), r.get("taskinfo_path")) for r in rows]
+            )
+    except sqlite3.IntegrityError:
+        print("error: batch contains an existing or duplicate task id. nothing added.", file=sys.stderr)
+        sys.exit(1)
+    print(f"tasks added: {len(rows)}")
+
+
 VALID_STATUSES = {'active', 'completed', 'paused', 'cancelled'}
 
 
+# fields left as NULL keep their current value
+_SQL_TASK_UPDATE = (
+    "UPDATE tasks SET status=COALESCE(?,status), summary=COALESCE(?,summary), "
+    "taskinfo_path=COALESCE(?,taskinfo_path), updated_at=datetime('now') WHERE id=?"
+)
+
+
 def cmd_task_update(args):
-    conn = get_conn()
-    init_db(conn)
-    fields = []
-    vals = []
-    if args.status:
-        if args.status not in VALID_STATUSES:
-            print(f"error: invalid status '{args.status}'. valid: {', '.join(sorted(VALID_STATUSES))}", file=sys.stderr)
-            sys.exit(1)
-        fields.append("status=?")
-        vals.append(args.status)
-    if args.summary is not None:
-        fields.append("summary=?")
-        vals.append(args.summary)
-    if args.taskinfo_path is not None:
-        fields.append("taskinfo_path=?")
-        vals.append(args.taskinfo_path)
-    if not fields:
+    conn = _conn()
+    status = args.status or None
+    if status is None and args.summary is None and args.taskinfo_path is None:
         print("error: nothing to update", file=sys.stderr)
         sys.exit(1)
-    fields.append("updated_at=datetime('now')")
-    vals.append(args.id)
-    cur = conn.execute(f"UPDATE tasks SET {','.join(fields)} WHERE id=?", vals)
-    conn.commit()
+    with conn:
+        cur = conn.execute(_SQL_TASK_UPDATE, (status, args.summary, args.taskinfo_path, args.id))
     if cur.rowcount == 0:
         print(f"error: task '{args.id}' not found", file=sys.stderr)
         sys.exit(1)
@@ -135,115 +279,159 @@ def cmd_task_update(args):
 
 # ── agent_runs ─────────────────────────────────────────────────────────────
 
+# completed_at is stamped by SQLite (UTC) for any result other than 'pending'
+_SQL_LOG_RUN = (
+    "INSERT INTO agent_runs (task_id,agent,action,result,session_id,completed_at,notes) "
+    "VALUES (?,?,?,?,?,CASE WHEN ?!='pending' THEN datetime('now') END,?)"
+)
+
+
 def cmd_log_run(args):
-    conn = get_conn()
-    init_db(conn)
-    completed_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S') if args.result and args.result != 'pending' else None
+    conn = _conn()
+    result = args.result or 'pending'
     try:
-        conn.execute(
-            "INSERT INTO agent_runs (task_id,agent,action,result,session_id,completed_at,notes) VALUES (?,?,?,?,?,?,?)",
-            (args.task_id, args.agent, args.action, args.result or 'pending', args.session_id, completed_at, args.notes)
-        )
-        conn.commit()
+        with conn:
+            conn.execute(
+                _SQL_LOG_RUN,
+                (args.task_id, args.agent, args.action, result, args.session_id, result, args.notes)
+            )
     except sqlite3.IntegrityError:
         print(f"error: task '{args.task_id}' not found", file=sys.stderr)
         sys.exit(1)
-    print(f"run logged: {args.agent} / {args.action} / {args.result or 'pending'}")
+    print(f"run logged: {args.agent} / {args.action} / {result}")
+
+
+def cmd_log_run_bulk(args):
+    rows = _read_jsonl(("agent", "action"), ("task_id", "result", "session_id", "notes"))
+    params = []
+    for r in rows:
+        result = r.get("result") or 'pending'
+        params.append((r.get("task_id"), r["agent"], r["action"], result, r.get("session_id"), result, r.get("notes")))
+    conn = _conn()
+    try:
+        with conn:
+            conn.executemany(_SQL_LOG_RUN, params)
+    except sqlite3.IntegrityError:
+        print("error: batch references a task that does not exist. nothing logged.", file=sys.stderr)
+        sys.exit(1)
+    print(f"runs logged: {len(rows)}")
+
+
+_RUNS_SELECT = "SELECT id,agent,action,result,task_id,session_id,date(started_at) AS day,notes FROM agent_runs "
+_RUNS_ORDER = "ORDER BY id DESC LIMIT 10"
+# keyed by the filter columns that are set, in (agent, task_id, result) order
+_SQL_RUNS = {
+    (): _RUNS_SELECT + _RUNS_ORDER,
+    ("agent",): _RUNS_SELECT + "WHERE agent=? " + _RUNS_ORDER,
+    ("task_id",): _RUNS_SELECT + "WHERE task_id=? " + _RUNS_ORDER,
+    ("result",): _RUNS_SELECT + "WHERE result=? " + _RUNS_ORDER,
+    ("agent", "task_id"): _RUNS_SELECT + "WHERE agent=? AND task_id=? " + _RUNS_ORDER,
+    ("agent", "result"): _RUNS_SELECT + "WHERE agent=? AND result=? " + _RUNS_ORDER,
+    ("task_id", "result"): _RUNS_SELECT + "WHERE task_id=? AND result=? " + _RUNS_ORDER,
+    ("agent", "task_id", "result"): _RUNS_SELECT + "WHERE agent=? AND task_id=? AND result=? " + _RUNS_ORDER,
+}
 
 
 def cmd_runs(args):
-    conn = get_conn()
-    init_db(conn)
-    where = []
-    vals = []
-    if args.agent:
-        where.append("agent=?")
-        vals.append(args.agent)
-    if args.task_id:
-        where.append("task_id=?")
-        vals.append(args.task_id)
-    if args.result:
-        where.append("result=?")
-        vals.append(args.result)
-    clause = ("WHERE " + " AND ".join(where)) if where else ""
-    rows = conn.execute(
-        f"SELECT id,agent,action,result,task_id,session_id,started_at,notes FROM agent_runs {clause} ORDER BY id DESC LIMIT 10",
-        vals
-    ).fetchall()
-    if not rows:
+    conn = _conn()
+    filters = [(col, val) for col, val in (("agent", args.agent), ("task_id", args.task_id), ("result", args.result)) if val]
+    sql = _SQL_RUNS[tuple(col for col, _ in filters)]
+    rows = conn.execute(sql, [val for _, val in filters])
+    out = []
+    for rid, agent, action, result, task_id, _, day, notes in rows:
+        task = f"[{task_id}]" if task_id else ""
+        notes = f" | {notes}" if notes else ""
+        out.append(f"#{rid} {agent} {task} {action} → {result} ({day}){notes}")
+    if not out:
         print("no runs")
         return
-    for r in rows:
-        task = f"[{r['task_id']}]" if r['task_id'] else ""
-        notes = f" | {r['notes']}" if r['notes'] else ""
-        print(f"#{r['id']} {r['agent']} {task} {r['action']} → {r['result']} ({r['started_at'][:10]}){notes}")
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 # ── errors ─────────────────────────────────────────────────────────────────
 
 def cmd_error_add(args):
-    conn = get_conn()
-    init_db(conn)
-    existing = conn.execute("SELECT id,occurrences FROM errors WHERE pattern=?", (args.pattern,)).fetchone()
-    if existing:
-        conn.execute(
-            "UPDATE errors SET occurrences=occurrences+1, last_seen=datetime('now'), context=COALESCE(?,context), solution=COALESCE(?,solution) WHERE id=?",
-            (args.context, args.solution, existing['id'])
-        )
-        conn.commit()
-        print(f"error updated (occurrences={existing['occurrences']+1}): {args.pattern}")
-    else:
-        conn.execute(
-            "INSERT INTO errors (pattern,context,solution) VALUES (?,?,?)",
+    conn = _conn()
+    with conn:
+        occurrences = conn.execute(
+            "INSERT INTO errors (pattern,context,solution) VALUES (?,?,?) "
+            "ON CONFLICT(pattern) DO UPDATE SET occurrences=occurrences+1, last_seen=datetime('now'), "
+            "context=COALESCE(excluded.context,context), solution=COALESCE(excluded.solution,solution) "
+            "RETURNING occurrences",
             (args.pattern, args.context, args.solution)
-        )
-        conn.commit()
+        ).fetchone()[0]
+    if occurrences > 1:
+        print(f"error updated (occurrences={occurrences}): {args.pattern}")
+    else:
         print(f"error added: {args.pattern}")
 
 
+def _has_errors_fts(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='errors_fts'").fetchone() is not None
+
+
+def _fts_query(q):
+    """Quote the query as one FTS5 phrase so user input never hits query syntax."""
+    return '"' + q.replace('"', '""') + '"'
+
+
+_SQL_ERRORS_RECENT = "SELECT id,pattern,context,solution,occurrences,last_seen FROM errors ORDER BY last_seen DESC LIMIT ?"
+_SQL_ERRORS_SEARCH = (
+    "SELECT e.id,e.pattern,e.context,e.solution,e.occurrences,e.last_seen FROM errors e "
+    "JOIN errors_fts f ON f.rowid=e.id WHERE errors_fts MATCH ? ORDER BY e.occurrences DESC"
+)
+# used when errors_fts is missing or the query is under 3 characters, which
+# trigram MATCH can't serve
+_SQL_ERRORS_LIKE = (
+    "SELECT id,pattern,context,solution,occurrences,last_seen FROM errors "
+    "WHERE pattern LIKE ?1 OR context LIKE ?1 OR solution LIKE ?1 ORDER BY occurrences DESC"
+)
+_SQL_ERRORS_TOP = "SELECT id,pattern,context,solution,occurrences,last_seen FROM errors ORDER BY occurrences DESC LIMIT 10"
+
+
 def cmd_errors(args):
-    conn = get_conn()
-    init_db(conn)
+    conn = _conn()
     if args.recent:
-        rows = conn.execute(
-            "SELECT id,pattern,context,solution,occurrences,last_seen FROM errors ORDER BY last_seen DESC LIMIT ?",
-            (args.recent,)
-        ).fetchall()
-    elif args.query:
-        rows = conn.execute(
-            "SELECT id,pattern,context,solution,occurrences,last_seen FROM errors WHERE pattern LIKE ? OR context LIKE ? OR solution LIKE ? ORDER BY occurrences DESC",
-            (f"%{args.query}%", f"%{args.query}%", f"%{args.query}%")
-        ).fetchall()
+        rows = conn.execute(_SQL_ERRORS_RECENT, (args.recent,))
+    elif args.query and args.query.strip():
+        if len(args.query) >= 3 and _has_errors_fts(conn):
+            rows = conn.execute(_SQL_ERRORS_SEARCH, (_fts_query(args.query),))
+        else:
+            rows = conn.execute(_SQL_ERRORS_LIKE, (f"%{args.query}%",))
     else:
-        rows = conn.execute(
-            "SELECT id,pattern,context,solution,occurrences,last_seen FROM errors ORDER BY occurrences DESC LIMIT 10"
-        ).fetchall()
-    if not rows:
+        rows = conn.execute(_SQL_ERRORS_TOP)
+    out = []
+    for eid, pattern, context, solution, occurrences, _ in rows:
+        ctx = f" [{context}]" if context else ""
+        sol = f" → {solution}" if solution else ""
+        out.append(f"#{eid} x{occurrences}{ctx} {pattern}{sol}")
+    if not out:
         print("no errors")
         return
-    for r in rows:
-        ctx = f" [{r['context']}]" if r['context'] else ""
-        sol = f" → {r['solution']}" if r['solution'] else ""
-        print(f"#{r['id']} x{r['occurrences']}{ctx} {r['pattern']}{sol}")
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 # ── context_snapshots ──────────────────────────────────────────────────────
 
 def cmd_snapshot_save(args):
-    conn = get_conn()
-    init_db(conn)
+    import json
+    conn = _conn()
     active_tasks = args.active_tasks
     if active_tasks:
         try:
-            json.loads(active_tasks)
+            parsed = json.loads(active_tasks)
         except json.JSONDecodeError:
+            parsed = None
+        if not isinstance(parsed, list):
             print("error: --active-tasks must be valid JSON array", file=sys.stderr)
             sys.exit(1)
-    conn.execute(
-        "INSERT INTO context_snapshots (session_id,active_tasks,current_work,pending_items,notes) VALUES (?,?,?,?,?)",
-        (args.session_id, active_tasks, args.current_work, args.pending, args.notes)
-    )
-    conn.commit()
+        # store the canonical compact form so reads never see formatting noise
+        active_tasks = json.dumps(parsed, separators=(',', ':'), ensure_ascii=False)
+    with conn:
+        conn.execute(
+            "INSERT INTO context_snapshots (session_id,active_tasks,current_work,pending_items,notes) VALUES (?,?,?,?,?)",
+            (args.session_id, active_tasks, args.current_work, args.pending, args.notes)
+        )
     print(f"snapshot saved: session={args.session_id}")
 
 
@@ -251,8 +439,9 @@ def _print_snapshot(r):
     if not r:
         print("no snapshot")
         return
-    print(f"snapshot #{r['id']} @ {r['created_at'][:16]} session={r['session_id']}")
+    print(f"snapshot #{r['id']} @ {r['created_at']} session={r['session_id']}")
     if r['active_tasks']:
+        import json
         tasks = json.loads(r['active_tasks'])
         print(f"  active: {', '.join(tasks)}")
     if r['current_work']:
@@ -263,75 +452,121 @@ def _print_snapshot(r):
         print(f"  notes: {r['notes']}")
 
 
+_SQL_SNAPSHOT_COLS = "id,session_id,strftime('%Y-%m-%d %H:%M',created_at) AS created_at,active_tasks,current_work,pending_items,notes"
+_SQL_SNAPSHOT_LATEST = f"SELECT {_SQL_SNAPSHOT_COLS} FROM context_snapshots ORDER BY id DESC LIMIT 1"
+_SQL_SNAPSHOT_BY_SESSION = f"SELECT {_SQL_SNAPSHOT_COLS} FROM context_snapshots WHERE session_id=? ORDER BY id DESC LIMIT 1"
+
+
+def _fetch_snapshot(sql, params=()):
+    # the connection yields plain tuples; only snapshots want named access
+    cur = _conn().cursor()
+    cur.row_factory = sqlite3.Row
+    return cur.execute(sql, params).fetchone()
+
+
 def cmd_snapshot_latest(args):
-    conn = get_conn()
-    init_db(conn)
-    r = conn.execute("SELECT * FROM context_snapshots ORDER BY id DESC LIMIT 1").fetchone()
-    _print_snapshot(r)
+    _print_snapshot(_fetch_snapshot(_SQL_SNAPSHOT_LATEST))
 
 
 def cmd_snapshot(args):
-    conn = get_conn()
-    init_db(conn)
-    r = conn.execute("SELECT * FROM context_snapshots WHERE session_id=? ORDER BY id DESC LIMIT 1", (args.session_id,)).fetchone()
-    _print_snapshot(r)
+    _print_snapshot(_fetch_snapshot(_SQL_SNAPSHOT_BY_SESSION, (args.session_id,)))
 
 
 # ── recover ────────────────────────────────────────────────────────────────
 
+_SQL_RECOVER = """
+    SELECT * FROM (SELECT 'T',id,title,summary,NULL,NULL FROM tasks WHERE status='active' ORDER BY updated_at DESC)
+    UNION ALL
+    SELECT * FROM (SELECT 'S',session_id,strftime('%Y-%m-%d %H:%M',created_at),current_work,pending_items,notes FROM context_snapshots ORDER BY id DESC LIMIT 1)
+    UNION ALL
+    SELECT * FROM (SELECT 'R',agent,action,result,task_id,date(started_at) FROM agent_runs ORDER BY id DESC LIMIT 5)
+    UNION ALL
+    SELECT * FROM (SELECT 'E',pattern,solution,occurrences,NULL,NULL FROM errors ORDER BY last_seen DESC LIMIT 3)
+"""
+
+
 def cmd_recover(args):
     """One-shot context recovery. Compact output < 500 tokens."""
-    conn = get_conn()
-    init_db(conn)
+    conn = _conn()
+
+    # one round-trip; rows are tagged by section and partitioned here
+    groups = {"T": [], "S": [], "R": [], "E": []}
+    for row in conn.execute(_SQL_RECOVER):
+        groups[row[0]].append(row[1:])
+
+    out = []
 
     # active tasks
-    tasks = conn.execute("SELECT id,title,summary FROM tasks WHERE status='active' ORDER BY updated_at DESC").fetchall()
-    print("=TASKS")
-    if tasks:
-        for t in tasks:
-            s = f" {t['summary']}" if t['summary'] else ""
-            print(f"  {t['id']}: {t['title']}{s}")
+    out.append("=TASKS")
+    if groups["T"]:
+        for tid, title, summary, _, _ in groups["T"]:
+            s = f" {summary}" if summary else ""
+            out.append(f"  {tid}: {title}{s}")
     else:
-        print("  none")
+        out.append("  none")
 
     # latest snapshot
-    snap = conn.execute("SELECT * FROM context_snapshots ORDER BY id DESC LIMIT 1").fetchone()
-    print("=SNAPSHOT")
-    if snap:
-        print(f"  session={snap['session_id']} at={snap['created_at'][:16]}")
-        if snap['current_work']:
-            print(f"  work: {snap['current_work']}")
-        if snap['pending_items']:
-            print(f"  pending: {snap['pending_items']}")
-        if snap['notes']:
-            print(f"  notes: {snap['notes']}")
+    out.append("=SNAPSHOT")
+    if groups["S"]:
+        session_id, created_at, current_work, pending_items, notes = groups["S"][0]
+        out.append(f"  session={session_id} at={created_at}")
+        if current_work:
+            out.append(f"  work: {current_work}")
+        if pending_items:
+            out.append(f"  pending: {pending_items}")
+        if notes:
+            out.append(f"  notes: {notes}")
     else:
-        print("  none")
+        out.append("  none")
 
     # last 5 agent runs
-    runs = conn.execute("SELECT agent,action,result,task_id,started_at FROM agent_runs ORDER BY id DESC LIMIT 5").fetchall()
-    print("=RUNS")
-    if runs:
-        for r in runs:
-            task = f"[{r['task_id']}]" if r['task_id'] else ""
-            print(f"  {r['agent']} {task} {r['action']} → {r['result']} ({r['started_at'][:10]})")
+    out.append("=RUNS")
+    if groups["R"]:
+        for agent, action, result, task_id, day in groups["R"]:
+            task = f"[{task_id}]" if task_id else ""
+            out.append(f"  {agent} {task} {action} → {result} ({day})")
     else:
-        print("  none")
+        out.append("  none")
 
     # recent errors (last 3)
-    errors = conn.execute("SELECT pattern,solution,occurrences FROM errors ORDER BY last_seen DESC LIMIT 3").fetchall()
-    print("=ERRORS")
-    if errors:
-        for e in errors:
-            sol = f" → {e['solution']}" if e['solution'] else ""
-            print(f"  x{e['occurrences']} {e['pattern']}{sol}")
+    out.append("=ERRORS")
+    if groups["E"]:
+        for pattern, solution, occurrences, _, _ in groups["E"]:
+            sol = f" → {solution}" if solution else ""
+            out.append(f"  x{occurrences} {pattern}{sol}")
     else:
-        print("  none")
+        out.append("  none")
+
+    sys.stdout.write("\n".join(out) + "\n")
+
+
+# ── migrate ────────────────────────────────────────────────────────────────
+
+def cmd_migrate(args):
+    conn = _conn()
+    print(f"schema at version {conn.execute('PRAGMA user_version').fetchone()[0]}")
 
 
 # ── CLI setup ──────────────────────────────────────────────────────────────
 
+# Bare invocations of the hot read commands skip argparse entirely; the
+# namespace carries the same defaults the parser would have produced.
+_FAST_PATHS = {
+    "recover": (cmd_recover, {}),
+    "snapshot-latest": (cmd_snapshot_latest, {}),
+    "tasks": (cmd_tasks, {"all": False, "status": None}),
+}
+
+
 def main():
+    if len(sys.argv) == 2 and sys.argv[1] in _FAST_PATHS:
+        from types import SimpleNamespace
+        func, defaults = _FAST_PATHS[sys.argv[1]]
+        func(SimpleNamespace(**defaults))
+        return
+
+    # imported here so cold starts that never parse options don't pay for it
+    import argparse
     p = argparse.ArgumentParser(prog="winter-db.py", description="Winter's structured memory CLI")
     sub = p.add_subparsers(dest="cmd", required=True)
 
@@ -339,6 +574,7 @@ def main():
     p_tasks = sub.add_parser("tasks", help="list tasks")
     p_tasks.add_argument("--all", action="store_true")
     p_tasks.add_argument("--status")
+    p_tasks.set_defaults(func=cmd_tasks)
 
     # task-add
     p_ta = sub.add_parser("task-add", help="add a task")
@@ -346,13 +582,18 @@ def main():
     p_ta.add_argument("title")
     p_ta.add_argument("--summary")
     p_ta.add_argument("--taskinfo-path")
+    p_ta.set_defaults(func=cmd_task_add)
+
+    # task-add-bulk
+    sub.add_parser("task-add-bulk", help="add tasks from JSON lines on stdin").set_defaults(func=cmd_task_add_bulk)
 
     # task-update
     p_tu = sub.add_parser("task-update", help="update a task")
     p_tu.add_argument("id")
-    p_tu.add_argument("--status")
+    p_tu.add_argument("--status", choices=sorted(VALID_STATUSES))
     p_tu.add_argument("--summary")
     p_tu.add_argument("--taskinfo-path")
+    p_tu.set_defaults(func=cmd_task_update)
 
     # log-run
     p_lr = sub.add_parser("log-run", help="log an agent run")
@@ -362,23 +603,30 @@ def main():
     p_lr.add_argument("--result", default="pending")
     p_lr.add_argument("--session-id")
     p_lr.add_argument("--notes")
+    p_lr.set_defaults(func=cmd_log_run)
+
+    # log-run-bulk
+    sub.add_parser("log-run-bulk", help="log agent runs from JSON lines on stdin").set_defaults(func=cmd_log_run_bulk)
 
     # runs
     p_runs = sub.add_parser("runs", help="query agent runs")
     p_runs.add_argument("--agent")
     p_runs.add_argument("--task-id")
     p_runs.add_argument("--result")
+    p_runs.set_defaults(func=cmd_runs)
 
     # error-add
     p_ea = sub.add_parser("error-add", help="log an error pattern")
     p_ea.add_argument("--pattern", required=True)
     p_ea.add_argument("--context")
     p_ea.add_argument("--solution")
+    p_ea.set_defaults(func=cmd_error_add)
 
     # errors
     p_errs = sub.add_parser("errors", help="search errors")
     p_errs.add_argument("query", nargs="?")
     p_errs.add_argument("--recent", type=int)
+    p_errs.set_defaults(func=cmd_errors)
 
     # snapshot-save
     p_ss = sub.add_parser("snapshot-save", help="save context snapshot")
@@ -387,33 +635,24 @@ def main():
     p_ss.add_argument("--pending")
     p_ss.add_argument("--active-tasks")
     p_ss.add_argument("--notes")
+    p_ss.set_defaults(func=cmd_snapshot_save)
 
     # snapshot-latest
-    sub.add_parser("snapshot-latest", help="load latest snapshot")
+    sub.add_parser("snapshot-latest", help="load latest snapshot").set_defaults(func=cmd_snapshot_latest)
 
     # snapshot
     p_snap = sub.add_parser("snapshot", help="load snapshot by session")
     p_snap.add_argument("--session-id", required=True)
+    p_snap.set_defaults(func=cmd_snapshot)
 
     # recover
-    sub.add_parser("recover", help="full context recovery dump")
+    sub.add_parser("recover", help="full context recovery dump").set_defaults(func=cmd_recover)
 
-    args = p.parse_args()
+    # migrate
+    sub.add_parser("migrate", help="create or upgrade the schema").set_defaults(func=cmd_migrate)
 
-    dispatch = {
-        "tasks": cmd_tasks,
-        "task-add": cmd_task_add,
-        "task-update": cmd_task_update,
-        "log-run": cmd_log_run,
-        "runs": cmd_runs,
-        "error-add": cmd_error_add,
-        "errors": cmd_errors,
-        "snapshot-save": cmd_snapshot_save,
-        "snapshot-latest": cmd_snapshot_latest,
-        "snapshot": cmd_snapshot,
-        "recover": cmd_recover,
-    }
-    dispatch[args.cmd](args)
+    args = p.parse_args()
+    args.func(args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+"""Tests for src-tauri/resources/winter-db.py. Run: python3 -m unittest discover -s tests"""
+
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "src-tauri", "resources", "winter-db.py")
+
+# schema as created by the original (unversioned) init_db
+V0_SCHEMA = """
+    CREATE TABLE tasks (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        status TEXT DEFAULT 'active',
+        created_at TEXT DEFAULT (datetime('now')),
+        updated_at TEXT DEFAULT (datetime('now')),
+        taskinfo_path TEXT,
+        summary TEXT
+    );
+    CREATE TABLE agent_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id TEXT,
+        agent TEXT NOT NULL,
+        action TEXT NOT NULL,
+        result TEXT DEFAULT 'pending',
+        session_id TEXT,
+        started_at TEXT DEFAULT (datetime('now')),
+        completed_at TEXT,
+        notes TEXT,
+        FOREIGN KEY (task_id) REFERENCES tasks(id)
+    );
+    CREATE TABLE errors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pattern TEXT NOT NULL,
+        context TEXT,
+        solution TEXT,
+        occurrences INTEGER DEFAULT 1,
+        first_seen TEXT DEFAULT (datetime('now')),
+        last_seen TEXT DEFAULT (datetime('now'))
+    );
+    CREATE TABLE context_snapshots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT,
+        created_at TEXT DEFAULT (datetime('now')),
+        active_tasks TEXT,
+        current_work TEXT,
+        pending_items TEXT,
+        notes TEXT
+    );
+"""
+
+
+class WinterDBTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.script = os.path.join(self.dir, "winter-db.py")
+        shutil.copy(SCRIPT, self.script)
+        self.db_path = os.path.join(self.dir, "winter.db")
+
+    def run_cli(self, *args, stdin=None):
+        return subprocess.run(
+            [sys.executable, self.script, *args],
+            input=stdin, capture_output=True, text=True,
+        )
+
+    def run_patched(self, patch, *args):
+        """Run the CLI in-process after applying `patch` (Python source) to the module `m`."""
+        code = (
+            "import importlib.util, sys\n"
+            f"spec = importlib.util.spec_from_file_location('winter_db', {self.script!r})\n"
+            "m = importlib.util.module_from_spec(spec)\n"
+            "spec.loader.exec_module(m)\n"
+            f"{patch}\n"
+            f"sys.argv = ['winter-db.py', *{list(args)!r}]\n"
+            "m.main()\n"
+        )
+        return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+
+    def db(self):
+        conn = sqlite3.connect(self.db_path)
+        self.addCleanup(conn.close)
+        return conn
+
+
+class MigrationTest(WinterDBTestCase):
+    def make_v0_db(self, errors):
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(V0_SCHEMA)
+        conn.executemany(
+            "INSERT INTO errors (pattern,context,solution,occurrences,first_seen,last_seen) VALUES (?,?,?,?,?,?)",
+            errors,
+        )
+        conn.commit()
+        conn.close()
+
+    def test_v0_duplicates_are_merged(self):
+        self.make_v0_db([
+            ("dup", "ctx1", None, 1, "2024-01-02 00:00:00", "2024-01-03 00:00:00"),
+            ("dup", None, "sol2", 5, "2024-01-01 00:00:00", "2024-02-01 00:00:00"),
+            ("other", None, None, 2, "2024-01-01 00:00:00", "2024-01-01 00:00:00"),
+        ])
+
+        res = self.run_cli("recover")
+        self.assertEqual(res.returncode, 0, res.stderr)
+        self.assertIn("x6 dup → sol2", res.stdout)
+
+        rows = self.db().execute(
+            "SELECT id,pattern,context,solution,occurrences,first_seen,last_seen FROM errors ORDER BY id"
+        ).fetchall()
+        self.assertEqual(rows, [
+            (1, "dup", "ctx1", "sol2", 6, "2024-01-01 00:00:00", "2024-02-01 00:00:00"),
+            (3, "other", None, None, 2, "2024-01-01 00:00:00", "2024-01-01 00:00:00"),
+        ])
+
+    def test_migration_records_version_and_indexes_errors(self):
+        self.make_v0_db([("dup", None, "fix it", 1, "2024-01-01", "2024-01-01")] * 2)
+
+        self.assertEqual(self.run_cli("tasks").returncode, 0)
+        conn = self.db()
+        self.assertGreater(conn.execute("PRAGMA user_version").fetchone()[0], 0)
+        self.assertEqual(conn.execute("PRAGMA integrity_check").fetchone()[0], "ok")
+
+        res = self.run_cli("errors", "fix")
+        self.assertEqual(res.returncode, 0, res.stderr)
+        self.assertIn("x2 dup → fix it", res.stdout)
+
+        res = self.run_cli("error-add", "--pattern", "dup")
+        self.assertIn("occurrences=3", res.stdout)
+
+    def occurrences(self, pattern):
+        return [r[0] for r in self.db().execute("SELECT occurrences FROM errors WHERE pattern=?", (pattern,))]
+
+    def test_interrupted_migration_is_rolled_back(self):
+        self.make_v0_db([("dup", None, None, 1, "2024-01-01", "2024-01-01")] * 2)
+
+        # fail right after the merge UPDATE, before the duplicate rows are deleted
+        res = self.run_patched(
+            "m._SCHEMA = m._SCHEMA.replace('DELETE FROM errors WHERE', 'DELETE FROM no_such_table WHERE')",
+            "recover",
+        )
+        self.assertIn("no such table: no_such_table", res.stderr)
+        self.assertEqual(self.occurrences("dup"), [1, 1])
+        self.assertEqual(self.db().execute("PRAGMA user_version").fetchone()[0], 0)
+
+        self.assertEqual(self.run_cli("recover").returncode, 0)
+        self.assertEqual(self.run_cli("migrate").returncode, 0)
+        self.assertEqual(self.run_cli("migrate").returncode, 0)
+        self.assertEqual(self.occurrences("dup"), [2])
+
+    def test_missing_trigram_tokenizer_falls_back_to_like(self):
+        self.make_v0_db([("TypeError foo", None, None, 1, "2024-01-01", "2024-01-01")])
+
+        res = self.run_patched("m._SCHEMA_FTS = m._SCHEMA_FTS.replace(\"'trigram'\", \"'no_such_tokenizer'\")", "recover")
+        self.assertEqual(res.returncode, 0, res.stderr)
+        conn = self.db()
+        self.assertGreater(conn.execute("PRAGMA user_version").fetchone()[0], 0)
+        self.assertIsNone(conn.execute("SELECT 1 FROM sqlite_master WHERE name LIKE 'errors_fts%'").fetchone())
+
+        self.assertIn("occurrences=2", self.run_cli("error-add", "--pattern", "TypeError foo").stdout)
+        res = self.run_cli("errors", "Error")
+        self.assertEqual(res.returncode, 0, res.stderr)
+        self.assertIn("TypeError foo", res.stdout)
+
+
+class ErrorSearchTest(WinterDBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.run_cli("error-add", "--pattern", "TypeError foo")
+        self.run_cli("error-add", "--pattern", "KeyError: 'x'", "--solution", "use .get")
+
+    def search(self, query):
+        res = self.run_cli("errors", query)
+        self.assertEqual(res.returncode, 0, res.stderr)
+        return res.stdout
+
+    def test_substring_inside_word(self):
+        out = self.search("Error")
+        self.assertIn("TypeError foo", out)
+        self.assertIn("KeyError", out)
+        self.assertIn("TypeError foo", self.search("rror f"))
+
+    def test_short_query_and_syntax_characters(self):
+        self.assertIn("TypeError foo", self.search("Ty"))
+        self.assertIn("KeyError", self.search('.get'))
+        self.assertEqual(self.search('x"y'), "no errors\n")
+
+
+class BulkImportTest(WinterDBTestCase):
+    def test_task_add_bulk(self):
+        res = self.run_cli("task-add-bulk", stdin='{"id":"a","title":"A"}\n\n{"id":"b","title":"B","summary":"s"}\n')
+        self.assertEqual(res.stdout, "tasks added: 2\n")
+        self.assertIn("[active] b: B | s", self.run_cli("tasks").stdout)
+
+    def test_rejects_blank_required_and_non_scalar_optional(self):
+        cases = [
+            ("task-add-bulk", '{"id":"   ","title":"ws"}', "line 1: missing id"),
+            ("task-add-bulk", '{"id":"a","title":"A"}\n{"id":"d","title":"D","summary":{"x":1}}',
+             "line 2: summary must be a string or number"),
+            ("log-run-bulk", '{"agent":"a","action":"b","notes":[1]}', "line 1: notes must be a string or number"),
+            ("log-run-bulk", '{"agent":"c","action":"z","result":true}', "line 1: result must be a string or number"),
+        ]
+        for cmd, stdin, message in cases:
+            with self.subTest(cmd=cmd, stdin=stdin):
+                res = self.run_cli(cmd, stdin=stdin)
+                self.assertEqual(res.returncode, 1)
+                self.assertIn(message, res.stderr)
+                self.assertNotIn("Traceback", res.stderr)
+        self.assertEqual(self.run_cli("tasks", "--all").stdout, "no tasks\n")
+
+
+if __name__ == "__main__":
+    unittest.main()